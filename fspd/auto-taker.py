@@ -27,24 +27,50 @@ Environment Variables:
     ORDER_SUBMISSION_HIGHER_BOUNDARY - Upper Time boundary in seconds to delay between Orders submission.
 
 Requirements:
-    pip3 install aiohttp
+    pip3 install -r requirements.txt
 """
 
 # built ins
 import asyncio
-import json
 import os
 import logging
 import base64
+import binascii
 import hmac
 import time
 from random import uniform
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 from enum import Enum, auto
 
 # installed
 import aiohttp
+import orjson
+import yarl
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Maximum number of Order requests in flight at once
+ORDER_CONCURRENCY_LIMIT: int = 32
+
+# Seconds ahead of each cycle that its Orders are signed
+SIGNING_LEAD_TIME: float = 0.1
+
+# Oldest signature in seconds an Order is sent with before being re-signed
+MAX_SIGNATURE_AGE: float = 2 * SIGNING_LEAD_TIME
+
+# Paradigm RESToverHTTP Order endpoint
+ORDERS_PATH: str = '/v1/fs/orders'
+
+# Encoded RESToverHTTP methods used for request signing
+METHOD_BYTES: Dict[str, bytes] = {
+    'GET': b'GET',
+    'POST': b'POST'
+    }
 
 
 class TradeAction(Enum):
@@ -57,20 +83,6 @@ class OrderType(Enum):
     MARKET = auto()
 
 
-@dataclass
-class Strategy:
-    id: str
-    min_block_size: int
-
-    def __init__(
-        self,
-        id: str,
-        min_block_size: int
-            ) -> None:
-        self.id: str = id
-        self.min_block_size: int = min_block_size
-
-
 class Order:
     def __init__(
         self,
@@ -88,19 +100,20 @@ class Order:
         self.type: OrderType = type
         self.price: str = price
 
-    @property
-    def order_payload(self):
-        _order_payload: Dict = {
-                                'account_name': self.account_name,
-                                'strategy_id': self.id,
-                                'type': self.type,
-                                'amount': self.amount,
-                                'side': self.side
-                                }
+        # Order payloads never change once constructed
+        self._cached_payload: Dict = {
+                                      'account_name': self.account_name,
+                                      'strategy_id': self.id,
+                                      'type': self.type,
+                                      'amount': self.amount,
+                                      'side': self.side
+                                      }
         if self.price:
-            _order_payload['price'] = self.price
+            self._cached_payload['price'] = self.price
 
-        return _order_payload
+    @property
+    def order_payload(self) -> Dict:
+        return self._cached_payload
 
 
 class AutoTaker():
@@ -123,195 +136,353 @@ class AutoTaker():
         self.order_submission_lower_boundary: int = int(order_submission_lower_boundary)
         self.order_submission_higher_boundary: int = int(order_submission_higher_boundary)
 
-        # Async Event Loop
-        self.loop = asyncio.get_event_loop()
+        # Static Request Signing values
+        self._signing_key: bytes = base64.b64decode(paradigm_taker_secret_key.encode('utf-8'))
+        self._hmac_template: hmac.HMAC = hmac.new(self._signing_key, digestmod='sha256')
+        self._bearer: str = f'Bearer {paradigm_taker_access_key}'
+        self._hdr_template: Dict = {'Authorization': self._bearer}
+
+        # Persistent HTTP Session, created within the running loop
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # asyncio primitives, created within the running loop by run()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._tx_queue: Optional[asyncio.Queue] = None
+        self._release: Optional[asyncio.Event] = None
+
+    async def run(self) -> None:
+        """
+        Entrypoint coroutine, run via asyncio.run().
+        """
+        # Bounds concurrent Order submissions
+        self._sem = asyncio.Semaphore(ORDER_CONCURRENCY_LIMIT)
+
+        # Signed Order batches handed from the signer to manager()
+        self._tx_queue = asyncio.Queue(maxsize=2)
+        self._release = asyncio.Event()
 
         # Initialize Instrument Ingestion
-        self.loop.run_until_complete(
-            self.manager()
-            )
+        await self.manager()
 
     async def manager(self):
         """
         Primary management coroutine.
         """
-        # Pull all available Strategies
-        self.availabile_strateies: List[Strategy] = await self.ingest_available_strategies()
+        # Single keep-alive Session shared by all requests
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                base_url=self.paradigm_http_url,
+                connector=aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=64,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300
+                    )
+                )
 
-        # Construct Order Payloads
-        self.order_payloads: List[Order] = await self.construct_order_payloads()
+        try:
+            # Pull all available Strategies
+            await self.ingest_available_strategies()
 
-        while True:
-            submitted_orders: List[asyncio.Task] = []
+            # Construct Order Payloads and their serialized bodies
+            await self.construct_order_payloads()
 
-            for order in self.order_payloads:
-                submitted_order: asyncio.Task = self.loop.create_task(
-                    self.post_order(
-                        order_payload=order.order_payload
-                    )
-                    )
-                submitted_orders.append(submitted_order)
+            # Reusable per-cycle Order Task slots
+            self._n: int = len(self.payload_bytes)
+            self._task_buf: List[Optional[asyncio.Task]] = [None] * self._n
 
-            await asyncio.gather(*submitted_orders)
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
 
-            await asyncio.sleep(
-                uniform(
-                    self.order_submission_lower_boundary,
-                    self.order_submission_higher_boundary
-                )
-                )
+            # Sign each cycle's Orders ahead of its submission
+            signer: asyncio.Task = asyncio.create_task(self._signer_loop())
+            self._release.set()
 
-    async def construct_order_payloads(self) -> List[Order]:
+            try:
+                while True:
+                    cycle_start: float = loop.time()
+
+                    signed_orders: List[Tuple[bytes, Dict, bytes]] = await self._tx_queue.get()
+                    await self.post_orders_batch(
+                        signed_orders=signed_orders
+                        )
+
+                    # Request latency counts towards the submission cadence
+                    elapsed: float = loop.time() - cycle_start
+                    remaining: float = max(
+                        0,
+                        uniform(
+                            self.order_submission_lower_boundary,
+                            self.order_submission_higher_boundary
+                            ) - elapsed
+                        )
+
+                    # Release the signer just before the next cycle so timestamps stay fresh
+                    lead: float = min(remaining, SIGNING_LEAD_TIME)
+                    await asyncio.sleep(remaining - lead)
+                    self._release.set()
+                    await asyncio.sleep(lead)
+            finally:
+                signer.cancel()
+        finally:
+            await self._session.close()
+            self._session = None
+
+    async def construct_order_payloads(self) -> None:
         """
-        Creates all Order Payloads from available strategies.
+        - Creates all Order Payloads from available strategies.
+        - Serializes each once into the bodies submitted every cycle.
+        - Precomputes the static part of each body's signature message.
         """
-        order_payloads: List[Order] = []
+        self.payload_bytes: List[bytes] = []
+        self.signing_suffixes: List[bytes] = []
+        self.order_headers: List[Dict] = []
 
-        for strategy in self.availabile_strateies:
+        for strategy_id, strategy_amount in zip(self.strategy_ids, self.strategy_amounts):
             for side in [*TradeAction]:
                 order: Order = Order(
-                    id=strategy.id,
+                    id=strategy_id,
                     side=side.name,
-                    amount=strategy.min_block_size,
+                    amount=strategy_amount,
                     account_name=self.paradigm_taker_account_name
                     )
-                order_payloads.append(order)
-        return order_payloads
+                order_body: bytes = orjson.dumps(order.order_payload)
+                self.payload_bytes.append(order_body)
+                self.signing_suffixes.append(
+                    self.signing_suffix(
+                        method='POST',
+                        path=ORDERS_PATH,
+                        body=order_body
+                        )
+                    )
+                self.order_headers.append(
+                    {**self._hdr_template, 'Content-Type': 'application/json'}
+                    )
 
-    async def ingest_available_strategies(self) -> List[Strategy]:
+        # Signed in place by the signer every cycle
+        self._signed_orders: List[Tuple[bytes, Dict, bytes]] = list(
+            zip(self.payload_bytes, self.order_headers, self.signing_suffixes)
+            )
+
+    async def ingest_available_strategies(self) -> None:
         """
         - Pulls all available Strategies from Paradigm
-        - Ingests key attributes of each.
+        - Ingests key attributes of each as parallel lists.
         """
-        available_strategies: List[Strategy] = []
+        self.strategy_ids: List[str] = []
+        self.strategy_amounts: List[int] = []
+
+        # Pages are cursor linked so must be followed in order
+        cursor: Optional[str] = None
+        while True:
+            response: Dict = await self.get_strategies(
+                cursor=cursor
+                )
 
-        response: Dict = await self.get_strategies()
+            for strategy in response['results']:
+                self.strategy_ids.append(strategy['id'])
+                self.strategy_amounts.append(strategy['min_block_size'])
+
+            cursor = response.get('next')
+            if not cursor:
+                break
+
+    async def _signer_loop(self) -> None:
+        """
+        Signs every Order body each time manager()
+        releases the next cycle.
+        """
+        while True:
+            await self._release.wait()
+            self._release.clear()
 
-        for strategy in response['results']:
-            _strategy: Strategy = Strategy(
-                id=strategy['id'],
-                min_block_size=strategy['min_block_size']
+            # The previous cycle's Orders have all completed before
+            # the release, so their headers can be re-signed in place
+            for headers, signing_suffix in zip(self.order_headers, self.signing_suffixes):
+                self._sign_headers(
+                    headers=headers,
+                    signing_suffix=signing_suffix
+                    )
+
+            await self._tx_queue.put(self._signed_orders)
+
+    async def post_orders_batch(
+        self,
+        signed_orders: List[Tuple[bytes, Dict, bytes]]
+            ) -> None:
+        """
+        Submits a batch of Orders concurrently.
+
+        Paradigm does not expose a bulk [POST] /orders
+        endpoint so each Order remains its own request,
+        bounded by ORDER_CONCURRENCY_LIMIT.
+        """
+        for i in range(self._n):
+            order_body, headers, signing_suffix = signed_orders[i]
+            self._task_buf[i] = asyncio.create_task(
+                self.post_order(
+                    order_body=order_body,
+                    headers=headers,
+                    signing_suffix=signing_suffix
+                )
                 )
-            available_strategies.append(_strategy)
 
-        return available_strategies
+        try:
+            for submitted_order in asyncio.as_completed(self._task_buf):
+                await submitted_order
+        finally:
+            # Don't leave in-flight Orders behind if the batch is abandoned
+            for submitted_order in self._task_buf:
+                submitted_order.cancel()
 
     async def post_order(
         self,
-        order_payload: Dict
+        order_body: bytes,
+        headers: Dict,
+        signing_suffix: bytes
             ) -> None:
         """
         Paradigm RESToverHTTP endpoint.
         [POST] /orders
-        """
-        method: str = 'POST'
-        path: str = '/v1/fs/orders'
-
-        _payload: str = json.dumps(order_payload)
 
-        headers: Dict = await self.create_rest_headers(
-            method=method,
-            path=path,
-            body=_payload
-            )
+        The Order body must already be signed into headers.
+        """
+        async with self._sem:
+            # Orders held behind the semaphore are re-signed so
+            # none are sent with a signature older than MAX_SIGNATURE_AGE
+            signed_at: int = int(headers['Paradigm-API-Timestamp'])
+            if time.time_ns() // 1_000_000 - signed_at > MAX_SIGNATURE_AGE * 1000:
+                self._sign_headers(
+                    headers=headers,
+                    signing_suffix=signing_suffix
+                    )
 
-        async with aiohttp.ClientSession() as session:
             try:
-                async with session.post(
-                    paradigm_http_url+path,
+                async with self._session.post(
+                    ORDERS_PATH,
                     headers=headers,
-                    json=order_payload
+                    data=order_body
                         ) as response:
                     status_code: int = response.status
-                    response: Dict = await response.json(content_type=None)
+                    # The created Order body isn't used so is never parsed
                     if status_code == 201:
-                        logging.info(f'Order Create {status_code} | Response: {response}')
-                    else:
-                        logging.info('Unable to [POST] /orders')
-                        logging.info(f'Status Code: {status_code}')
-                        logging.info(f'Response Text: {response}')
-                        logging.info(f'Order Payload: {order_payload}')
-            except aiohttp.ClientConnectorError as e:
-                logging.info(f'[POST] /orders ClientConnectorError: {e}')
-
-    async def get_strategies(self) -> Dict:
+                        logger.info('Order Create %d', status_code)
+                    elif logger.isEnabledFor(logging.INFO):
+                        response_body: bytes = await response.read()
+                        try:
+                            response_text = orjson.loads(response_body)
+                        except orjson.JSONDecodeError:
+                            response_text = response_body.decode('utf-8', errors='replace')
+                        logger.info('Unable to [POST] /orders')
+                        logger.info('Status Code: %d', status_code)
+                        logger.info('Response Text: %s', response_text)
+                        logger.info('Order Payload: %s', order_body.decode('utf-8'))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Pooled connections can go stale, never let one Order end the cycle
+                logger.info('[POST] /orders %s: %s', type(e).__name__, e)
+
+    async def get_strategies(
+        self,
+        cursor: Optional[str] = None
+            ) -> Dict:
         """
         Paradigm RESToverHTTP endpoint.
         [GET] /strategies
         """
         method: str = 'GET'
         path: str = '/v1/fs/strategies?page_size=100'
-        payload: str = ''
-
-        headers: Dict = await self.create_rest_headers(
-            method=method,
-            path=path,
-            body=payload
+        if cursor:
+            path += f'&cursor={quote(cursor, safe="")}'
+        payload: bytes = b''
+
+        # Already escaped, so the exact path signed is the path sent
+        url: yarl.URL = yarl.URL(path, encoded=True)
+
+        headers: Dict = self._build_headers(
+            signing_suffix=self.signing_suffix(
+                method=method,
+                path=url.raw_path_qs,
+                body=payload
+                )
             )
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                paradigm_http_url+path,
-                headers=headers
-                    ) as response:
-                status_code: int = response.status
-                if status_code == 200:
-                    response: Dict = await response.json()
-                else:
-                    message: str = 'Unable to [GET] /strategies'
-                    logging.error(message)
-                    logging.error(f'Status Code: {status_code}')
-                    logging.error(f'Response Text: {response}')
+        async with self._session.get(
+            url,
+            headers=headers
+                ) as response:
+            status_code: int = response.status
+            if status_code == 200:
+                response: Dict = await response.json()
+            else:
+                message: str = 'Unable to [GET] /strategies'
+                logger.error(message)
+                logger.error('Status Code: %d', status_code)
+                logger.error('Response Text: %s', response)
         return response
 
-    async def sign_request(
+    def signing_suffix(
         self,
-        paradigm_secret_key: str,
         method: str,
         path: str,
-        body: Dict
-            ) -> Tuple[int, bytes]:
+        body: bytes
+            ) -> bytes:
+        """
+        Creates the static portion of a request's signature
+        message, everything following the timestamp.
+        """
+        _method: bytes = METHOD_BYTES[method.upper()]
+        _path: bytes = path.encode('utf-8')
+
+        return b'\n' + _method + b'\n' + _path + b'\n' + body
+
+    def sign_request(
+        self,
+        signing_suffix: bytes
+            ) -> Tuple[bytes, bytes]:
         """
         Creates the required signature neccessary
         as apart of all RESToverHTTP requests with Paradigm.
         """
-        _secret_key: bytes = paradigm_secret_key.encode('utf-8')
-        _method: bytes = method.encode('utf-8')
-        _path: bytes = path.encode('utf-8')
-        _body: bytes = body.encode('utf-8')
-        signing_key: bytes = base64.b64decode(_secret_key)
-        timestamp: str = str(int(time.time() * 1000)).encode('utf-8')
-        message: bytes = b'\n'.join([timestamp, _method.upper(), _path, _body])
-        digest: hmac.digest = hmac.digest(signing_key, message, 'sha256')
-        signature: bytes = base64.b64encode(digest)
+        timestamp: bytes = str(time.time_ns() // 1_000_000).encode('utf-8')
+        # Copying the keyed template skips re-deriving the HMAC pads
+        _hmac: hmac.HMAC = self._hmac_template.copy()
+        _hmac.update(timestamp)
+        _hmac.update(signing_suffix)
+        digest: bytes = _hmac.digest()
+        signature: bytes = binascii.b2a_base64(digest, newline=False)
 
         return timestamp, signature
 
-    async def create_rest_headers(
+    def _sign_headers(
         self,
-        method: str,
-        path: str,
-        body: Dict
+        headers: Dict,
+        signing_suffix: bytes
             ) -> Dict:
         """
-        Creates the required headers to authenticate
-        Paradigm RESToverHTTP requests.
+        Signs an existing headers dict in place to
+        authenticate a Paradigm RESToverHTTP request.
         """
-        timestamp, signature = await self.sign_request(
-            paradigm_secret_key=self.paradigm_taker_secret_key,
-            method=method,
-            path=path,
-            body=body
+        timestamp, signature = self.sign_request(
+            signing_suffix=signing_suffix
             )
 
-        headers: Dict = {
-            'Paradigm-API-Timestamp': timestamp.decode('utf-8'),
-            'Paradigm-API-Signature': signature.decode('utf-8'),
-            'Authorization': f'Bearer {self.paradigm_taker_access_key}'
-            }
+        headers['Paradigm-API-Timestamp'] = timestamp.decode('utf-8')
+        headers['Paradigm-API-Signature'] = signature.decode('utf-8')
 
         return headers
 
+    def _build_headers(
+        self,
+        signing_suffix: bytes
+            ) -> Dict:
+        """
+        Creates the required headers to authenticate
+        Paradigm RESToverHTTP requests.
+        """
+        return self._sign_headers(
+            headers=dict(self._hdr_template),
+            signing_suffix=signing_suffix
+            )
+
 
 if __name__ == "__main__":
     # Local Testing
@@ -335,6 +506,10 @@ if __name__ == "__main__":
         datefmt='%Y-%m-%d %H:%M:%S'
         )
 
+    # Faster Event Loop where available
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     main: AutoTaker = AutoTaker(
         paradigm_http_url=paradigm_http_url,
         paradigm_taker_account_name=os.environ['PARADIGM_TAKER_ACCOUNT_NAME'],
@@ -344,3 +519,5 @@ if __name__ == "__main__":
         order_submission_lower_boundary=os.environ['ORDER_SUBMISSION_LOWER_BOUNDARY'],
         order_submission_higher_boundary=os.environ['ORDER_SUBMISSION_HIGHER_BOUNDARY']
         )
+
+    asyncio.run(main.run())